@@ -1,17 +1,75 @@
 import os
-import subprocess
-import json
+import asyncio
 import re
-import uuid
-from flask import Flask, request, jsonify, Response, stream_with_context
+import time
+import itertools
+import fnmatch
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+import httpx
+import orjson
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential, wait_exponential_jitter
+from quart import Quart, Response, g, request
+from quart.json.provider import JSONProvider
 from dotenv import load_dotenv
-import glob
-from pathlib import Path
 
 # Load environment variables from .env file
 load_dotenv()
 
-app = Flask(__name__)
+class OrjsonProvider(JSONProvider):
+    """Parse request bodies with orjson"""
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+app = Quart(__name__)
+app.json = OrjsonProvider(app)
+# Reject oversized request bodies before they are read
+app.config["MAX_CONTENT_LENGTH"] = 4 * 1024 * 1024
+
+OLLAMA_MODEL = "qwen3:1.7b"
+
+# Bound in-flight Ollama generations; extra callers queue here instead of on the model runner
+_OLLAMA_SEM = asyncio.Semaphore(int(os.getenv("OLLAMA_MAX_CONCURRENCY", "2")))
+_ollama_waiting = 0
+
+# Execution IDs are pid-counter-time; the pid is refreshed in forked workers
+_PID = os.getpid()
+_EXEC_COUNTER = itertools.count()
+
+def _reset_exec_id_pid():
+    global _PID
+    _PID = os.getpid()
+
+os.register_at_fork(after_in_child=_reset_exec_id_pid)
+
+# In-flight generations keyed by prompt hash so identical concurrent prompts share one call
+_inflight = {}
+
+# Completed Ollama responses keyed by prompt hash
+_RESP_CACHE = OrderedDict()
+_RESP_CACHE_MAX = 512
+
+# discover_files results keyed by (directory, pattern), validated by the mtimes of the directories walked
+_GLOB_CACHE = OrderedDict()
+_GLOB_CACHE_MAX = 128
+_GLOB_CACHE_LOCK = threading.Lock()
+
+# Files larger than this are truncated before being put into a prompt
+MAX_FILE_BYTES = int(os.getenv("MAX_FILE_BYTES", 256_000))
+
+# Prompts are kept under this many bytes by trimming the file content
+MAX_PROMPT_BYTES = int(os.getenv("MAX_PROMPT_BYTES", 32_000))
+
+# Frontmatter-stripped file contents keyed by (abspath, mtime_ns, size), bounded by total text length
+_FILE_CACHE = OrderedDict()
+_FILE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+_file_cache_bytes = 0
+_FILE_CACHE_LOCK = threading.Lock()
 
 # MCP Protocol Schema Definitions
 TOOL_SCHEMAS = {
@@ -28,6 +86,10 @@ TOOL_SCHEMAS = {
                 "query": {
                     "type": "string",
                     "description": "The question or task to perform on the file content"
+                },
+                "cache": {
+                    "type": "boolean",
+                    "description": "Reuse a cached answer for an identical prompt (default true)"
                 }
             },
             "required": ["file_path", "query"]
@@ -46,6 +108,10 @@ TOOL_SCHEMAS = {
                 "pattern": {
                     "type": "string",
                     "description": "File pattern to match (e.g., '*.md', '*.py')"
+                },
+                "resolve_symlinks": {
+                    "type": "boolean",
+                    "description": "Return paths with symlinks resolved (default false)"
                 }
             },
             "required": ["directory", "pattern"]
@@ -53,220 +119,469 @@ TOOL_SCHEMAS = {
     }
 }
 
+# Static response bodies, serialized once at import
+_ROOT_BODY = orjson.dumps({"status": "MCP Bridge API is running"})
+_HEALTH_BODY = orjson.dumps({"status": "ok"})
+_VERSION_BODY = orjson.dumps({"version": "0.1"})
+_TOOLS_BODY = orjson.dumps({"tools": list(TOOL_SCHEMAS.values())})
+_TOOLS_ETAG = hashlib.blake2b(_TOOLS_BODY, digest_size=16).hexdigest()
+
+@app.before_serving
+async def open_ollama_client():
+    """Create the shared Ollama client so requests reuse keep-alive connections"""
+    app.ollama = httpx.AsyncClient(
+        base_url="http://localhost:11434",
+        limits=httpx.Limits(max_connections=8, max_keepalive_connections=8),
+        timeout=300
+    )
+
+@app.after_serving
+async def close_ollama_client():
+    await app.ollama.aclose()
+
+@app.after_request
+async def add_cache_header(response):
+    """Report whether the Ollama answer came from the response cache"""
+    cache_status = g.get("cache_status")
+    if cache_status:
+        response.headers["X-Cache"] = cache_status
+    return response
+
+def _exec_id():
+    """Return a process-unique execution ID without reading /dev/urandom"""
+    return f"{_PID:x}-{next(_EXEC_COUNTER):x}-{time.time_ns():x}"
+
+def _json_response(obj, status=200):
+    """Serialize obj with orjson into a JSON response"""
+    return Response(orjson.dumps(obj), status=status, mimetype="application/json")
+
 # Standard MCP routes
 @app.route("/", methods=["GET", "POST"])
-def root():
-    return jsonify({"status": "MCP Bridge API is running"})
+async def root():
+    return Response(_ROOT_BODY, mimetype="application/json")
 
 @app.route("/health", methods=["GET"])
-def health():
+async def health():
     """Health check endpoint for Gemini CLI to verify connection"""
-    return jsonify({"status": "ok"})
+    return Response(_HEALTH_BODY, mimetype="application/json")
 
 @app.route("/mcp/health", methods=["GET"])
-def mcp_health():
+async def mcp_health():
     """MCP protocol health check endpoint for Gemini CLI to verify connection"""
-    return jsonify({"status": "ok"})
+    return _json_response({"status": "ok", "ollama_queue": _ollama_waiting})
 
 # Legacy route for backward compatibility
 @app.route("/mcp_query", methods=["POST"])
-def mcp_query():
+async def mcp_query():
+    data = await request.get_json(silent=True, cache=False)
+    if not isinstance(data, dict):
+        return _json_response({"error": "Invalid JSON body"}, 400)
+    
     try:
         # Get the prompt and file_path from the request
-        data = request.json
         prompt = data.get("prompt", "")
         file_path = data.get("file_path", "")
         
         # Read file content if file_path is provided
-        file_content = read_file_content(file_path)
-        
-        # Build prompt for Ollama
-        combined_prompt = f"Here is the content from a file:\n\n{file_content}\n\nUser query: {prompt}\n\nPlease respond to the user query based on the file content."
+        file_content = await asyncio.to_thread(read_file_content, file_path)
         
         # Call Ollama API
-        full_response = call_ollama_api(combined_prompt)
+        full_response = await call_ollama_api(build_prompt(file_content, prompt), data.get("cache", True))
         
-        return jsonify({"answer": full_response})
+        return _json_response({"answer": full_response})
             
+    except PromptTooLargeError as e:
+        return _json_response({"error": str(e)}, 413)
     except Exception as e:
-        return jsonify({"error": f"Exception processing request: {str(e)}"})
+        return _json_response({"error": f"Exception processing request: {str(e)}"})
 
 # MCP Protocol Endpoints
 @app.route("/mcp/version", methods=["GET"])
-def mcp_version():
+async def mcp_version():
     """Return the MCP protocol version"""
-    return jsonify({"version": "0.1"})
+    return Response(_VERSION_BODY, mimetype="application/json")
 
 @app.route("/mcp/tools", methods=["GET"])
-def mcp_tools():
+async def mcp_tools():
     """Return the list of available tools following MCP protocol"""
-    tools = list(TOOL_SCHEMAS.values())
-    return jsonify({"tools": tools})
+    headers = {"ETag": f'"{_TOOLS_ETAG}"'}
+    if request.if_none_match.contains_weak(_TOOLS_ETAG):
+        return Response(status=304, headers=headers)
+    return Response(_TOOLS_BODY, mimetype="application/json", headers=headers)
 
 @app.route("/mcp/resources", methods=["GET"])
-def mcp_resources():
+async def mcp_resources():
     """Return the list of available resources following MCP protocol"""
-    return jsonify({"resources": []})  # No resources implemented yet
+    return _json_response({"resources": []})  # No resources implemented yet
 
 @app.route("/mcp/tools/<tool_name>", methods=["POST"])
-def execute_tool(tool_name):
+async def execute_tool(tool_name):
     """Execute a tool by name"""
-    if tool_name not in TOOL_SCHEMAS:
-        return jsonify({"error": f"Tool '{tool_name}' not found"}), 404
+    if tool_name not in TOOL_HANDLERS:
+        return _json_response({"error": f"Tool '{tool_name}' not found"}, 404)
+    
+    data = await request.get_json(silent=True, cache=False)
+    if not isinstance(data, dict):
+        return _json_response({"error": "Invalid JSON body"}, 400)
     
     try:
-        data = request.json
+        error = _require(data, TOOL_SCHEMAS[tool_name]["parameters"]["required"])
+        if error:
+            return _json_response({"error": error}, 400)
         
-        if tool_name == "analyze_file":
-            file_path = data.get("file_path")
-            query = data.get("query")
-            
-            if not file_path or not query:
-                return jsonify({"error": "Missing required parameters"}), 400
-                
-            # Read file content
-            file_content = read_file_content(file_path)
-            
-            # Build prompt for Ollama
-            combined_prompt = f"Here is the content from a file:\n\n{file_content}\n\nUser query: {query}\n\nPlease respond to the user query based on the file content."
-            
-            # Call Ollama API
-            response = call_ollama_api(combined_prompt)
-            
-            return jsonify({"result": response})
-            
-        elif tool_name == "discover_files":
-            directory = data.get("directory")
-            pattern = data.get("pattern")
-            
-            if not directory or not pattern:
-                return jsonify({"error": "Missing required parameters"}), 400
-                
-            # Find files matching pattern
-            search_path = os.path.join(directory, "**", pattern)
-            matching_files = glob.glob(search_path, recursive=True)
-            
-            return jsonify({"files": matching_files})
+        result = await TOOL_HANDLERS[tool_name](data)
+        
+        # This route returns dict results (discover_files) as the body itself
+        return _json_response(result if isinstance(result, dict) else {"result": result})
             
+    except PromptTooLargeError as e:
+        return _json_response({"error": str(e)}, 413)
     except Exception as e:
-        return jsonify({"error": f"Error executing tool: {str(e)}"}), 500
+        return _json_response({"error": f"Error executing tool: {str(e)}"}, 500)
 
 @app.route("/mcp/execute", methods=["POST"])
-def mcp_execute():
+async def mcp_execute():
     """Execute a tool following MCP protocol"""
+    execution_id = _exec_id()
+    data = await request.get_json(silent=True, cache=False)
+    if not isinstance(data, dict) or not isinstance(data.get("arguments", {}), dict):
+        return _json_response({
+            "error": "Invalid JSON body",
+            "execution_id": execution_id
+        }, 400)
+    
     try:
-        data = request.json
         tool_name = data.get("name")
         arguments = data.get("arguments", {})
-        execution_id = str(uuid.uuid4())
         
-        if tool_name not in TOOL_SCHEMAS:
-            return jsonify({
+        if tool_name not in TOOL_HANDLERS:
+            return _json_response({
                 "error": f"Unknown tool: {tool_name}",
                 "execution_id": execution_id
-            }), 404
+            }, 404)
         
-        if tool_name == "analyze_file":
-            file_path = arguments.get("file_path")
-            query = arguments.get("query")
-            
-            if not file_path or not query:
-                return jsonify({
-                    "error": "Missing required parameters: file_path and query",
-                    "execution_id": execution_id
-                }), 400
-            
-            file_content = read_file_content(file_path)
-            combined_prompt = f"Here is the content from a file:\n\n{file_content}\n\nUser query: {query}\n\nPlease respond to the user query based on the file content."
-            response = call_ollama_api(combined_prompt)
-            
-            return jsonify({
-                "execution_id": execution_id,
-                "result": response
-            })
-            
-        elif tool_name == "discover_files":
-            directory = arguments.get("directory")
-            pattern = arguments.get("pattern")
-            
-            if not directory or not pattern:
-                return jsonify({
-                    "error": "Missing required parameters: directory and pattern",
-                    "execution_id": execution_id
-                }), 400
-            
-            try:
-                search_path = os.path.join(directory, "**", pattern)
-                files = glob.glob(search_path, recursive=True)
-                files = [str(Path(f).resolve()) for f in files]
-                
-                return jsonify({
-                    "execution_id": execution_id,
-                    "result": {
-                        "files": files,
-                        "count": len(files)
-                    }
-                })
-            except Exception as e:
-                return jsonify({
-                    "error": f"Error discovering files: {str(e)}",
-                    "execution_id": execution_id
-                }), 500
+        error = _require(arguments, TOOL_SCHEMAS[tool_name]["parameters"]["required"])
+        if error:
+            return _json_response({
+                "error": error,
+                "execution_id": execution_id
+            }, 400)
         
+        return _json_response({
+            "execution_id": execution_id,
+            "result": await TOOL_HANDLERS[tool_name](arguments)
+        })
+        
+    except PromptTooLargeError as e:
+        return _json_response({
+            "error": str(e),
+            "execution_id": execution_id
+        }, 413)
     except Exception as e:
-        return jsonify({
+        return _json_response({
             "error": f"Exception processing request: {str(e)}",
-            "execution_id": str(uuid.uuid4())
-        }), 500
+            "execution_id": execution_id
+        }, 500)
+
+# Tool handlers
+_PROMPT_TEMPLATE = "Here is the content from a file:\n\n{file_content}\n\nUser query: {query}\n\nPlease respond to the user query based on the file content."
+
+class PromptTooLargeError(ValueError):
+    """The query alone does not fit in MAX_PROMPT_BYTES"""
+
+def build_prompt(file_content, query):
+    """Build the Ollama prompt for a question about a file, trimming the file content to MAX_PROMPT_BYTES"""
+    prompt = _PROMPT_TEMPLATE.format(file_content=file_content, query=query)
+    over = len(prompt.encode('utf-8')) - MAX_PROMPT_BYTES
+    if over <= 0:
+        return prompt
+    
+    marker = "\n...[truncated]"
+    content = file_content.encode('utf-8')
+    keep = len(content) - over - len(marker)
+    if keep < 0:
+        raise PromptTooLargeError(f"Prompt exceeds {MAX_PROMPT_BYTES} bytes even without file content")
+    app.logger.warning("Truncating file content from %d to %d bytes to fit MAX_PROMPT_BYTES", len(content), keep)
+    file_content = content[:keep].decode('utf-8', errors='ignore') + marker
+    return _PROMPT_TEMPLATE.format(file_content=file_content, query=query)
+
+def _require(args, keys):
+    """Return an error message if any of the required arguments is missing"""
+    if not all(args.get(key) for key in keys):
+        return f"Missing required parameters: {' and '.join(keys)}"
+    return None
+
+# Filesystem work runs in a worker thread so a slow vault does not stall the event loop
+async def _handle_analyze(args):
+    file_content = await asyncio.to_thread(read_file_content, args["file_path"])
+    return await call_ollama_api(build_prompt(file_content, args["query"]), args.get("cache", True))
+
+async def _handle_discover(args):
+    files = await asyncio.to_thread(_discover_paths, args)
+    return {"files": files, "count": len(files)}
+
+def _discover_paths(args):
+    # abspath is pure string work; realpath costs syscalls per path, so it is opt-in
+    to_path = os.path.realpath if args.get("resolve_symlinks") else os.path.abspath
+    return [to_path(f) for f in discover_files(args["directory"], args["pattern"])]
+
+TOOL_HANDLERS = {
+    "analyze_file": _handle_analyze,
+    "discover_files": _handle_discover
+}
 
 # Helper functions
+def _strip_frontmatter(text):
+    """Drop a leading '---' ... '---' block without scanning the rest of the note"""
+    if not text.startswith('---'):
+        return text
+    end = text.find('\n---', 3)
+    if end == -1:
+        return text
+    nl = text.find('\n', end + 4)
+    return text[nl + 1:] if nl != -1 else ''
+
 def read_file_content(file_path):
     """Read file content with error handling and frontmatter removal"""
+    global _file_cache_bytes
     if not file_path:
         return "No file was provided. Please specify a file_path in your request to analyze specific content."
     
     try:
-        # First try to read as UTF-8
-        try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                file_content = file.read()
-        except UnicodeDecodeError:
-            # If that fails, try reading as binary and decode with latin-1
-            with open(file_path, 'rb') as file:
-                file_content = file.read().decode('latin-1', errors='ignore')
+        st = os.stat(file_path)
+        key = (os.path.abspath(file_path), st.st_mtime_ns, st.st_size)
+        with _FILE_CACHE_LOCK:
+            if key in _FILE_CACHE:
+                _FILE_CACHE.move_to_end(key)
+                return _FILE_CACHE[key]
+        
+        # Read at most MAX_FILE_BYTES; undecodable bytes become U+FFFD
+        with open(file_path, 'rb') as file:
+            data = file.read(MAX_FILE_BYTES + 1)
+        if len(data) > MAX_FILE_BYTES:
+            data = data[:MAX_FILE_BYTES] + b"\n...[truncated]"
+        file_content = data.decode('utf-8', errors='replace')
         
         # Remove YAML frontmatter if present
-        file_content = re.sub(r'^---\s*[\s\S]*?---\s*', '', file_content)
+        file_content = _strip_frontmatter(file_content)
+        
+        with _FILE_CACHE_LOCK:
+            if key not in _FILE_CACHE:
+                _FILE_CACHE[key] = file_content
+                _file_cache_bytes += len(file_content)
+            while _file_cache_bytes > _FILE_CACHE_MAX_BYTES and _FILE_CACHE:
+                _, cached = _FILE_CACHE.popitem(last=False)
+                _file_cache_bytes -= len(cached)
         return file_content
     except Exception as e:
         return f"Failed to read file: {str(e)}"
 
-def call_ollama_api(prompt):
-    """Call Ollama API and return the full response"""
-    curl_command = [
-        "curl", "-s", "-X", "POST", "http://localhost:11434/api/generate",
-        "-d", json.dumps({"model": "qwen3:1.7b", "prompt": prompt})
-    ]
+def _is_retryable(exc):
+    """Transport errors (connection resets included), 429 and 5xx are worth retrying.
     
-    result = subprocess.run(curl_command, capture_output=True, text=True)
+    Read timeouts are not: with a 300s timeout each retry would hold a
+    concurrency slot for another five minutes.
+    """
+    if isinstance(exc, httpx.ReadTimeout):
+        return False
+    if isinstance(exc, httpx.TransportError):
+        return True
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status == 429 or status >= 500
+    return False
+
+_backoff_wait = wait_exponential(multiplier=0.5, min=0.5, max=8)
+_jitter_wait = wait_exponential_jitter(initial=0.5, max=8)
+
+def _ollama_wait(retry_state):
+    """Exponential backoff, honoring Retry-After on 429 responses"""
+    exc = retry_state.outcome.exception()
+    if isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code == 429:
+        retry_after = exc.response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return min(float(retry_after), 8)
+        return _jitter_wait(retry_state)
+    return _backoff_wait(retry_state)
+
+@retry(
+    retry=retry_if_exception(_is_retryable),
+    wait=_ollama_wait,
+    stop=stop_after_attempt(3),
+    reraise=True
+)
+async def _generate(prompt):
+    """POST a single non-streaming generation request to Ollama"""
+    r = await app.ollama.post(
+        "/api/generate",
+        content=orjson.dumps({"model": OLLAMA_MODEL, "prompt": prompt, "stream": False}),
+        headers={"Content-Type": "application/json"}
+    )
+    r.raise_for_status()
+    return orjson.loads(r.content).get("response", "")
+
+@functools.lru_cache(maxsize=256)
+def _compiled_glob(pattern):
+    """Translate a glob segment to a regex once and reuse it across requests"""
+    return re.compile(fnmatch.translate(pattern))
+
+def _expand_states(segments, states):
+    """Let every '**' position also match zero directories"""
+    states = set(states)
+    for i in sorted(states):
+        while i < len(segments) and segments[i] == "**":
+            i += 1
+            states.add(i)
+    return frozenset(states)
+
+def _advance_states(segments, states, name):
+    """Return the segment positions reachable after consuming one path component.
     
-    if result.returncode != 0:
-        return f"Failed to call Ollama API: {result.stderr}"
+    Like glob, hidden names are only matched by segments that start with '.'.
+    """
+    hidden = name.startswith('.')
+    nxt = set()
+    for i in states:
+        if i == len(segments):
+            continue
+        seg = segments[i]
+        if hidden and not seg.startswith('.'):
+            continue
+        if seg == "**":
+            nxt.add(i)
+        elif _compiled_glob(seg).match(name):
+            nxt.add(i + 1)
+    return _expand_states(segments, nxt)
+
+def _scandir_matching(path, segments, states, visited):
+    """Yield file entries below path matching segments, only entering directories the pattern can still reach.
     
-    # Process the streaming response from Ollama
-    lines = result.stdout.strip().split('\n')
+    Each directory listed is appended to visited with its mtime, or None if
+    it does not exist, so a cached walk is invalidated once it appears.
+    """
+    visited.append((path, _mtime_ns(path)))
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_symlink():
+                    continue
+                nxt = _advance_states(segments, states, entry.name)
+                if not nxt:
+                    continue
+                if entry.is_dir():
+                    pending = frozenset(i for i in nxt if i < len(segments))
+                    if pending:
+                        yield from _scandir_matching(entry.path, segments, pending, visited)
+                elif len(segments) in nxt and entry.is_file():
+                    yield entry
+    except (PermissionError, FileNotFoundError, NotADirectoryError):
+        return
+
+def _split_literal_prefix(pattern):
+    """Split pattern into its leading wildcard-free directories and the rest"""
+    parts = pattern.split('/')
+    i = next((k for k, p in enumerate(parts) if any(c in p for c in '*?[')), len(parts))
+    return '/'.join(parts[:i]), '/'.join(parts[i:])
+
+def discover_files(directory, pattern):
+    """Find files below directory matching pattern.
     
-    # Collect all responses
-    full_response = ""
-    for line in lines:
-        try:
-            response_obj = json.loads(line)
-            if "response" in response_obj:
-                full_response += response_obj["response"]
-        except json.JSONDecodeError:
-            continue
+    A bare pattern like '*.md' matches at any depth. A pattern containing '/'
+    is relative to directory, so its literal leading directories are joined
+    directly instead of being searched for, and without '**' the walk stops
+    at the pattern's depth.
+    """
+    if '/' in pattern:
+        lit, rest = _split_literal_prefix(pattern)
+        base = os.path.join(directory, lit)
+        if not rest:
+            return [base] if os.path.isfile(base) else []
+        segments = tuple(rest.split('/'))
+    else:
+        base, segments = directory, ("**", pattern)
+    
+    key = (os.path.abspath(directory), pattern)
+    with _GLOB_CACHE_LOCK:
+        cached = _GLOB_CACHE.get(key)
+    if cached is not None and _dirs_unchanged(cached[0]):
+        with _GLOB_CACHE_LOCK:
+            if key in _GLOB_CACHE:
+                _GLOB_CACHE.move_to_end(key)
+        return list(cached[1])
+    
+    states = _expand_states(segments, {0})
+    visited = []
+    files = [entry.path for entry in _scandir_matching(base, segments, states, visited)]
+    
+    with _GLOB_CACHE_LOCK:
+        _GLOB_CACHE[key] = (visited, files)
+        _GLOB_CACHE.move_to_end(key)
+        while len(_GLOB_CACHE) > _GLOB_CACHE_MAX:
+            _GLOB_CACHE.popitem(last=False)
+    return list(files)
+
+def _mtime_ns(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def _dirs_unchanged(visited):
+    """Check that none of the directories from a previous walk were created, removed or modified since"""
+    return all(_mtime_ns(path) == mtime for path, mtime in visited)
+
+def _prompt_key(prompt):
+    return hashlib.blake2b(f"{OLLAMA_MODEL}|{prompt}".encode(), digest_size=16).digest()
+
+async def call_ollama_api(prompt, use_cache=True):
+    """Call Ollama API and return the full response.
+    
+    Answers are cached by prompt unless use_cache is false, e.g. for
+    non-deterministic sampling.
+    """
+    try:
+        if not use_cache:
+            g.cache_status = "MISS"
+            return await _call_ollama(prompt)
+        
+        key = _prompt_key(prompt)
+        if key in _RESP_CACHE:
+            _RESP_CACHE.move_to_end(key)
+            g.cache_status = "HIT"
+            return _RESP_CACHE[key]
+        
+        g.cache_status = "MISS"
+        fut = _inflight.get(key)
+        if fut is None:
+            fut = asyncio.ensure_future(_call_ollama_cached(key, prompt))
+            _inflight[key] = fut
+            fut.add_done_callback(lambda _: _inflight.pop(key, None))
+        # Shield so one caller disconnecting does not cancel the generation for the others
+        return await asyncio.shield(fut)
+    except httpx.HTTPError as e:
+        return f"Failed to call Ollama API: {str(e)}"
+
+async def _call_ollama_cached(key, prompt):
+    """Run one generation and store the answer in the response cache"""
+    response = await _call_ollama(prompt)
+    _RESP_CACHE[key] = response
+    while len(_RESP_CACHE) > _RESP_CACHE_MAX:
+        _RESP_CACHE.popitem(last=False)
+    return response
+
+async def _call_ollama(prompt):
+    """Run one generation, waiting for a concurrency slot first"""
+    global _ollama_waiting
+    _ollama_waiting += 1
+    try:
+        await _OLLAMA_SEM.acquire()
+    finally:
+        _ollama_waiting -= 1
     
-    return full_response
+    try:
+        return await _generate(prompt)
+    finally:
+        _OLLAMA_SEM.release()
 
 if __name__ == "__main__":
     # Get host and port from environment variables
@@ -274,4 +589,10 @@ if __name__ == "__main__":
     port = int(os.getenv("PORT", 5004))
     print(f"Starting MCP Bridge server on {host}:{port}")
     print(f"Available tools: {', '.join(TOOL_SCHEMAS.keys())}")
-    app.run(host=host, port=port, debug=True)
+    if os.getenv("DEBUG") == "1":
+        # Development server with reloader and debugger
+        app.run(host=host, port=port, debug=True)
+    else:
+        from hypercorn.asyncio import serve
+        from hypercorn.config import Config
+        asyncio.run(serve(app, Config.from_mapping(bind=[f"{host}:{port}"])))
@@ -0,0 +1,53 @@
+import asyncio
+import os
+
+import httpx
+
+import mcp_bridge
+
+
+def test_discover_files_sees_directory_created_after_first_call(tmp_path):
+    vault = tmp_path / "vault"
+    assert mcp_bridge.discover_files(str(vault), "*.md") == []
+
+    vault.mkdir()
+    (vault / "a.md").write_text("note")
+    assert mcp_bridge.discover_files(str(vault), "*.md") == [os.path.join(str(vault), "a.md")]
+
+
+def test_discover_files_sees_literal_prefix_created_after_first_call(tmp_path):
+    assert mcp_bridge.discover_files(str(tmp_path), "notes/*.md") == []
+
+    (tmp_path / "notes").mkdir()
+    (tmp_path / "notes" / "a.md").write_text("note")
+    assert mcp_bridge.discover_files(str(tmp_path), "notes/*.md") == [os.path.join(str(tmp_path), "notes", "a.md")]
+
+
+def test_discover_files_sees_file_added_in_nested_directory(tmp_path):
+    (tmp_path / "notes" / "2024").mkdir(parents=True)
+    (tmp_path / "notes" / "2024" / "a.md").write_text("note")
+    assert len(mcp_bridge.discover_files(str(tmp_path), "*.md")) == 1
+
+    (tmp_path / "notes" / "2024" / "b.md").write_text("note")
+    assert len(mcp_bridge.discover_files(str(tmp_path), "*.md")) == 2
+
+
+def test_read_timeouts_are_not_retried():
+    request = httpx.Request("POST", "http://localhost:11434/api/generate")
+    assert mcp_bridge._is_retryable(httpx.ConnectError("refused", request=request))
+    assert mcp_bridge._is_retryable(httpx.PoolTimeout("pool", request=request))
+    assert mcp_bridge._is_retryable(httpx.ReadError("conn reset", request=request))
+    assert mcp_bridge._is_retryable(httpx.RemoteProtocolError("Server disconnected without sending a response", request=request))
+    assert not mcp_bridge._is_retryable(httpx.ReadTimeout("stuck", request=request))
+
+
+def test_tools_etag_matches_weak_if_none_match():
+    async def status_for(etag):
+        async with mcp_bridge.app.test_app():
+            response = await mcp_bridge.app.test_client().get("/mcp/tools", headers={"If-None-Match": etag})
+            return response.status_code
+
+    etag = f'"{mcp_bridge._TOOLS_ETAG}"'
+    assert asyncio.run(status_for(etag)) == 304
+    assert asyncio.run(status_for("W/" + etag)) == 304
+    assert asyncio.run(status_for('"other"')) == 200